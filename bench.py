@@ -0,0 +1,149 @@
+"""
+Benchmark suite for Alien Invasion Defender.
+
+Runs the scripted stress scenarios built into the game (spacedefender.SCENARIOS:
+500 homing bullets, wave 9 at full strength, the boss holding one bullet
+pattern, 8 simultaneous explosions) headless. Each scenario runs in its own
+`spacedefender.py --scenario NAME` process, so every run starts from the
+same fresh game and the same seed. They drive the real classes through
+simulate_step and draw_frame.
+
+Every scenario reports frames/s, mean/p50/p99 ms per phase and per sprite
+class, and allocation figures. The results go to a JSON file. Comparing a
+run with a saved baseline flags every scenario whose frames/s dropped, or
+whose median busy time per frame rose, by more than the tolerance. Any
+regression sets the exit status, so the comparison can gate a change. Use
+--repeat on noisy machines: each scenario then keeps its fastest run.
+
+    python bench.py --repeat 3 --out baseline.json
+    python bench.py --repeat 3 --out new.json --compare baseline.json
+    python bench.py --compare baseline.json --current new.json   # no new runs
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+
+from vecenv import GAME_DIR, GAME_SCRIPT
+
+DEFAULT_TOLERANCE = 0.10
+
+
+def list_scenarios():
+    """Scenario names, in the order the game defines them."""
+    out = run_game(["--scenario", "list"])
+    return out.split()
+
+
+def run_game(extra):
+    env = dict(os.environ, PYGAME_HIDE_SUPPORT_PROMPT="1")
+    proc = subprocess.run([sys.executable, GAME_SCRIPT] + extra, cwd=GAME_DIR, env=env,
+                          stdout=subprocess.PIPE, text=True)
+    if proc.returncode != 0:
+        raise SystemExit(f"spacedefender.py {' '.join(extra)} failed with exit status {proc.returncode}")
+    return proc.stdout
+
+
+def run_scenario(name, seed=0, numpy_bullets=False):
+    extra = ["--scenario", name, "--seed", str(seed)]
+    if numpy_bullets:
+        extra.append("--numpy-bullets")
+    return json.loads(run_game(extra))
+
+
+def run_suite(names, seed=0, repeat=1, numpy_bullets=False):
+    """Run every scenario repeat times and keep its fastest run. Returns the results document."""
+    results = {}
+    for name in names:
+        runs = []
+        for i in range(repeat):
+            runs.append(run_scenario(name, seed, numpy_bullets))
+            print(f"{name}: {runs[-1]['fps']:.1f} frames/s (run {i + 1}/{repeat})", file=sys.stderr)
+        results[name] = max(runs, key=lambda r: r["fps"])
+    return {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "seed": seed,
+        "repeat": repeat,
+        "scenarios": results,
+    }
+
+
+def compare(baseline, current, tolerance=DEFAULT_TOLERANCE, file=sys.stdout):
+    """
+    Print frames/s and median busy ms per frame of every scenario in both
+    documents. Return the names of the scenarios that regressed by more than
+    tolerance.
+    """
+    regressions = []
+    names = [n for n in current["scenarios"] if n in baseline["scenarios"]]
+    width = max([len("scenario")] + [len(n) for n in names])
+    print(f"{'scenario':{width}} {'base fps':>9} {'fps':>9} {'change':>7}   "
+          f"{'base busy':>9} {'busy':>9} {'change':>7}", file=file)
+    for name in names:
+        old, new = baseline["scenarios"][name], current["scenarios"][name]
+        fps_change = new["fps"] / old["fps"] - 1
+        old_busy, new_busy = old["phases"]["busy"]["p50_ms"], new["phases"]["busy"]["p50_ms"]
+        busy_change = new_busy / old_busy - 1
+        regressed = fps_change < -tolerance or busy_change > tolerance
+        if regressed:
+            regressions.append(name)
+        print(f"{name:{width}} {old['fps']:9.1f} {new['fps']:9.1f} {fps_change:+7.1%}   "
+              f"{old_busy:9.3f} {new_busy:9.3f} {busy_change:+7.1%}" + ("   REGRESSION" if regressed else ""),
+              file=file)
+    for name in baseline["scenarios"]:
+        if name not in current["scenarios"]:
+            print(f"{name:{width}} (not in the current run)", file=file)
+    return regressions
+
+
+def load(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the benchmark scenarios and compare them with a baseline")
+    parser.add_argument("--scenario", action="append", default=[], metavar="NAME",
+                        help="run only this scenario (repeatable; default: all)")
+    parser.add_argument("--list", action="store_true", help="list the scenarios and exit")
+    parser.add_argument("--seed", type=int, default=0, help="seed every scenario starts from")
+    parser.add_argument("--repeat", type=int, default=1, help="runs per scenario; the fastest is kept")
+    parser.add_argument("--numpy-bullets", action="store_true", help="run enemy bullets on the array engine")
+    parser.add_argument("--out", metavar="FILE", default=None, help="write the results as JSON to FILE")
+    parser.add_argument("--compare", metavar="BASELINE", default=None,
+                        help="compare with a saved results file; exit status 1 on a regression")
+    parser.add_argument("--current", metavar="FILE", default=None,
+                        help="with --compare: compare this saved results file instead of running the suite")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="relative slowdown that counts as a regression (default 0.10)")
+    args = parser.parse_args()
+
+    if args.list:
+        print("\n".join(list_scenarios()))
+        return
+    if args.current is not None and args.compare is None:
+        parser.error("--current needs --compare")
+
+    if args.current is not None:
+        current = load(args.current)
+    else:
+        current = run_suite(args.scenario or list_scenarios(), seed=args.seed, repeat=args.repeat,
+                            numpy_bullets=args.numpy_bullets)
+        if args.out is not None:
+            with open(args.out, "w") as f:
+                json.dump(current, f, indent=2)
+        if args.out is None and args.compare is None:
+            print(json.dumps(current, indent=2))
+
+    if args.compare is not None:
+        regressions = compare(load(args.compare), current, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+"""
+Balance sweeps for Alien Invasion Defender.
+
+Runs the scripted bot (spacedefender.BotInput) through many headless games
+for every point of a grid of settings constants and streams one JSON line
+per game to a results file: the settings, the seed, the wave reached, the
+outcome (victory, death or timeout), the cause of death and the game time
+spent in each wave. Games are spread over a pool of `spacedefender.py
+--sweep-worker` processes (one per core by default). Each worker plays
+one job after another without restarting pygame.
+
+Every grid point is played with the same seeds, so differences between
+points come from the settings and not from luck. At the end (or with
+--summarize on an existing file) the survival curve of each point is
+printed: the share of runs that reached each wave.
+
+    python sweep.py --param PLAYER_COOLDOWN=100,150,200 --param TANK_HEALTH=10,15,20 \\
+                    --runs 1000 --out sweep.jsonl
+    python sweep.py --summarize sweep.jsonl
+"""
+import argparse
+import ast
+import itertools
+import json
+import os
+import queue
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+
+from vecenv import GAME_DIR, GAME_SCRIPT
+
+DEFAULT_MAX_FRAMES = 60 * 60 * 10  # ten minutes of game time, then the run counts as a timeout
+
+
+def parse_param(spec):
+    """
+    "NAME=v1,v2,..." -> (NAME, [v1, v2, ...]). Values are Python literals, so
+    tuples work too: "HOMING_SIZE=(6, 12),(8, 16)".
+    """
+    name, sep, values = spec.partition("=")
+    if not sep or not name.strip():
+        raise argparse.ArgumentTypeError(f"expected NAME=v1,v2,... but got {spec!r}")
+    try:
+        values = ast.literal_eval(f"[{values}]")
+    except (ValueError, SyntaxError):
+        raise argparse.ArgumentTypeError(f"bad values in {spec!r}")
+    if not values:
+        raise argparse.ArgumentTypeError(f"no values in {spec!r}")
+    return name.strip(), values
+
+
+def grid(params):
+    """Every combination of the (name, values) params, as settings dicts."""
+    names = [name for name, _ in params]
+    return [dict(zip(names, combo)) for combo in itertools.product(*(values for _, values in params))]
+
+
+def config_key(settings):
+    return json.dumps(settings, sort_keys=True)
+
+
+class SweepWorker:
+    """One spacedefender.py --sweep-worker process, playing one job at a time."""
+    def __init__(self, numpy_bullets=False):
+        cmd = [sys.executable, GAME_SCRIPT, "--sweep-worker"]
+        if numpy_bullets:
+            cmd.append("--numpy-bullets")
+        env = dict(os.environ, PYGAME_HIDE_SUPPORT_PROMPT="1")
+        self.proc = subprocess.Popen(cmd, cwd=GAME_DIR, env=env, text=True, bufsize=1,
+                                     stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+
+    def play(self, job):
+        self.proc.stdin.write(json.dumps(job) + "\n")
+        line = self.proc.stdout.readline()
+        if not line:
+            raise RuntimeError("sweep worker died")
+        return json.loads(line)
+
+    def close(self):
+        self.proc.stdin.close()
+        self.proc.wait()
+
+
+def run_sweep(configs, runs, out, workers, seed=0, wave=1, max_frames=DEFAULT_MAX_FRAMES, numpy_bullets=False):
+    """
+    Play runs games for every settings dict in configs and append one JSON
+    line per finished game to the open file out. Returns the records.
+    """
+    jobs = queue.Queue()
+    for i in range(runs):
+        for settings in configs:
+            jobs.put({"settings": settings, "seed": seed + i, "wave": wave, "max_frames": max_frames})
+    total = jobs.qsize()
+    done = queue.Queue()
+
+    def serve(worker):
+        try:
+            while True:
+                try:
+                    job = jobs.get_nowait()
+                except queue.Empty:
+                    return
+                done.put((job, worker.play(job)))
+        except Exception as e:
+            done.put((None, e))
+        finally:
+            worker.close()
+
+    pool = [threading.Thread(target=serve, args=(SweepWorker(numpy_bullets),), daemon=True)
+            for _ in range(min(workers, total))]
+    for t in pool:
+        t.start()
+
+    records = []
+    start = time.perf_counter()
+    while len(records) < total:
+        job, result = done.get()
+        if job is None:
+            raise result
+        if "error" in result:
+            raise SystemExit(f"{config_key(job['settings'])}: {result['error']}")
+        record = {"config": job["settings"], "seed": job["seed"], "start_wave": job["wave"], **result}
+        out.write(json.dumps(record) + "\n")
+        out.flush()
+        records.append(record)
+        if len(records) % 100 == 0 or len(records) == total:
+            elapsed = time.perf_counter() - start
+            print(f"\r{len(records)}/{total} games, {len(records) / elapsed:.1f} games/s", end="", file=sys.stderr)
+    print(file=sys.stderr)
+    return records
+
+
+def last_wave(records):
+    """
+    The highest wave any run reached. Sweeps may override WAVES, so the
+    table's length is only known from the results.
+    """
+    return max((r["wave"] for r in records), default=1)
+
+
+def survival_curve(records, start_wave=1, end_wave=None):
+    """
+    Share of runs that reached each wave, from start_wave to end_wave (the
+    highest wave reached if left out), plus the victory rate.
+    """
+    if end_wave is None:
+        end_wave = last_wave(records)
+    n = len(records)
+    curve = [sum(r["wave"] >= w for r in records) / n for w in range(start_wave, end_wave + 1)]
+    return curve, sum(r["outcome"] == "victory" for r in records) / n
+
+
+def summarize(records, file=sys.stdout):
+    by_config = defaultdict(list)
+    for r in records:
+        by_config[config_key(r["config"])].append(r)
+    start_wave = min((r["start_wave"] for r in records), default=1)
+
+    end_wave = max(last_wave(records), start_wave)
+    waves = range(start_wave, end_wave + 1)
+    width = max([len("config")] + [len(key) for key in by_config])
+    wave_header = " ".join(f"{'W' + str(w):>5}" for w in waves)
+
+    print("Survival: share of runs reaching each wave", file=file)
+    print(f"{'config':{width}} {'runs':>6} {wave_header}   win  mean wave", file=file)
+    for key, runs in sorted(by_config.items()):
+        curve, win = survival_curve(runs, start_wave, end_wave)
+        mean_wave = sum(r["wave"] for r in runs) / len(runs)
+        print(f"{key:{width}} {len(runs):6d} " + " ".join(f"{s:5.2f}" for s in curve) +
+              f" {win:5.2f}  {mean_wave:9.2f}", file=file)
+
+    print("\nMean game seconds spent in each wave (runs that reached it)", file=file)
+    print(f"{'config':{width}} {wave_header}", file=file)
+    for key, runs in sorted(by_config.items()):
+        per_wave = defaultdict(list)
+        for r in runs:
+            for w, t in enumerate(r["wave_times"], r["start_wave"]):
+                per_wave[w].append(t)
+        print(f"{key:{width}} " + " ".join(f"{sum(per_wave[w]) / len(per_wave[w]):5.1f}" if per_wave[w] else "    -"
+                                           for w in waves), file=file)
+
+    print("\nHow runs ended", file=file)
+    for key, runs in sorted(by_config.items()):
+        causes = Counter(r["cause"] if r["outcome"] == "death" else r["outcome"] for r in runs)
+        print(f"{key:{width}} " + ", ".join(f"{cause} {count / len(runs):.0%}" for cause, count in causes.most_common()),
+              file=file)
+
+
+def load_records(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep settings constants over many headless bot games")
+    parser.add_argument("--param", metavar="NAME=V1,V2,...", type=parse_param, action="append", default=[],
+                        help="a settings constant and the values to try (repeat for a grid)")
+    parser.add_argument("--runs", type=int, default=100, help="games per grid point")
+    parser.add_argument("--out", default="sweep.jsonl", help="results file, one JSON line per game")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="worker processes")
+    parser.add_argument("--seed", type=int, default=0, help="first seed (run i uses seed + i)")
+    parser.add_argument("--wave", type=int, default=1, metavar="N",
+                        help="wave every game starts at (checked against the game's wave table)")
+    parser.add_argument("--max-frames", type=int, default=DEFAULT_MAX_FRAMES,
+                        help="end a game as a timeout after this many simulation steps")
+    parser.add_argument("--numpy-bullets", action="store_true", help="run enemy bullets on the array engine")
+    parser.add_argument("--summarize", metavar="FILE", default=None,
+                        help="print the summary of an existing results file and exit")
+    args = parser.parse_args()
+
+    if args.wave < 1:
+        parser.error("--wave must be 1 or more")
+
+    if args.summarize is not None:
+        summarize(load_records(args.summarize))
+        return
+
+    configs = grid(args.param)
+    print(f"{len(configs)} grid points x {args.runs} runs on {args.workers} workers", file=sys.stderr)
+    start = time.perf_counter()
+    with open(args.out, "w") as out:
+        records = run_sweep(configs, args.runs, out, args.workers, seed=args.seed, wave=args.wave,
+                            max_frames=args.max_frames, numpy_bullets=args.numpy_bullets)
+    print(f"{len(records)} games in {time.perf_counter() - start:.1f} s, results in {args.out}\n", file=sys.stderr)
+    summarize(records)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+"""
+Shared fixture for the game's tests: one headless game set up per session
+(the module keeps its state in globals), settings restored after each test.
+"""
+import os
+import sys
+
+import pytest
+
+GAME_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+sys.path.insert(0, GAME_DIR)
+os.chdir(GAME_DIR)  # assets/ is looked up relative to the game directory
+
+import spacedefender  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def sd():
+    spacedefender.setup_game(["--headless", "--seed", "0"])
+    return spacedefender
+
+
+@pytest.fixture
+def game(sd):
+    """A fresh game on the default settings; settings overrides are undone afterwards."""
+    sd.restore_settings()
+    sd.random.seed(0)
+    sd.reset_game()
+    yield sd
+    sd.restore_settings()
@@ -0,0 +1,20 @@
+def test_high_water_is_read_on_release(game):
+    game.apply_setting("BULLET_POOL_HIGH_WATER", 2)
+    pool = game.BulletPool()
+    bullets = [pool.acquire(game.Bullet, 100, 100, -5, 1, (255, 255, 255)) for _ in range(5)]
+    for b in bullets:
+        pool.release(b)
+    assert pool.stats()["pooled"] == 2
+    # Releasing twice is a no-op
+    pool.release(bullets[0])
+    assert pool.stats()["live"] == 0
+
+
+def test_reuse_hands_back_a_reset_bullet(game):
+    pool = game.BulletPool(high_water=4)
+    first = pool.acquire(game.Bullet, 100, 100, -5, 1, (255, 255, 255))
+    pool.release(first)
+    second = pool.acquire(game.Bullet, 200, 300, 7, 2, (255, 0, 0))
+    assert second is first and not second.in_pool
+    assert second.rect.center == (200, 300) and second.damage == 2
+    assert pool.stats() == {"live": 1, "pooled": 0, "peak": 1, "created": 1, "reused": 1}
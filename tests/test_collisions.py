@@ -0,0 +1,67 @@
+import random
+
+import pygame
+import pytest
+
+
+class Box(pygame.sprite.Sprite):
+    def __init__(self, x, y, w, h):
+        super().__init__()
+        self.rect = pygame.Rect(x, y, w, h)
+
+
+class Target(Box):
+    def __init__(self, x, y, w, h):
+        super().__init__(x, y, w, h)
+        self.hits = []
+
+    def take_hit(self, damage):
+        self.hits.append(damage)
+
+
+class Shot(Box):
+    def __init__(self, x, y, damage):
+        super().__init__(x, y, 4, 10)
+        self.damage = damage
+        self.in_pool = False
+
+    def kill(self):
+        super().kill()
+        self.in_pool = True  # like a Bullet going back to the pool
+
+
+def scene(rng, targets, bullets):
+    group = pygame.sprite.Group(Target(rng.randint(-50, 800), rng.randint(-50, 600),
+                                       rng.randint(10, 300), rng.randint(10, 200)) for _ in range(targets))
+    shots = pygame.sprite.Group(Shot(rng.randint(0, 800), rng.randint(0, 600), i) for i in range(bullets))
+    return group, shots
+
+
+def test_buckets_hold_every_overlapping_sprite(sd):
+    rng = random.Random(1)
+    sprites = [Box(rng.randint(-20, 800), rng.randint(-20, 600), rng.randint(1, 40), rng.randint(1, 40))
+               for _ in range(300)]
+    grid = sd.SpatialHash(cell_size=64)
+    grid.rebuild(sprites)
+    for _ in range(200):
+        rect = pygame.Rect(rng.randint(-50, 800), rng.randint(-50, 600), rng.randint(1, 300), rng.randint(1, 300))
+        found = [sp for cell_sprites, _ in grid.buckets(rect) for sp in cell_sprites]
+        assert len(found) == len(set(found))
+        assert {sp for sp in sprites if sp.rect.colliderect(rect)} <= set(found)
+
+
+@pytest.mark.parametrize("min_pairs", [0, 10 ** 9])  # always the grid, never the grid
+def test_hits_match_brute_force(game, min_pairs):
+    game.apply_setting("PRECISE_COLLISIONS", False)
+    game.apply_setting("COLLISION_GRID_MIN_PAIRS", min_pairs)
+    rng = random.Random(2)
+    for _ in range(20):
+        targets, shots = scene(rng, 15, 80)
+        expected = {}
+        remaining = set(shots)
+        for t in targets:
+            expected[t] = sorted(s.damage for s in remaining if s.rect.colliderect(t.rect))
+            remaining -= {s for s in remaining if s.rect.colliderect(t.rect)}
+        game.resolve_player_bullet_hits(shots, [targets], grid=game.SpatialHash())
+        assert {t: sorted(t.hits) for t in targets} == expected
+        assert set(shots) == remaining
@@ -0,0 +1,19 @@
+def test_frame_count_follows_the_setting(game):
+    game.apply_setting("EXPLOSION_FRAMES", 5)
+    frames = game.get_explosion_frames()
+    assert len(frames) == 5
+    # Radii grow towards EXPLOSION_RADIUS, each frame sized to its circle
+    radii = [radius for _, radius in frames]
+    assert radii == sorted(radii) and radii[-1] < game.EXPLOSION_RADIUS
+    assert all(surf.get_width() == 2 * max(1, radius) for surf, radius in frames)
+    game.restore_settings()
+    assert len(game.get_explosion_frames()) == game.EXPLOSION_FRAMES == 30
+
+
+def test_explosion_draws_the_frame_for_its_age(game):
+    explosion = game.Explosion(400, 300)
+    explosion.start_time = game.clock.get_ticks() - game.EXPLOSION_DURATION // 2
+    rect = explosion.draw(game.screen)
+    assert rect.center == (400, 300)
+    explosion.start_time = game.clock.get_ticks() - game.EXPLOSION_DURATION
+    assert explosion.draw(game.screen) is None
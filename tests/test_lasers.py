@@ -0,0 +1,28 @@
+class Owner:
+    pass
+
+
+def test_band_on_a_lane_past_the_default_table(game):
+    # Lanes are sized from the settings when used, so a smaller lane height works
+    game.apply_setting("HORIZONTAL_LANE_HEIGHT", 30)
+    owner = Owner()
+    lane = (game.SCREEN_HEIGHT - 10) // 30
+    game.laser_hazards.open(owner, "y", [lane], 0, "laser")
+    game.laser_hazards.activate(owner, 0)
+    assert game.laser_hazards.band_at("y", game.SCREEN_HEIGHT - 10, 1) is not None
+    assert game.laser_hazards.band_at("y", 10, 1) is None
+    game.laser_hazards.close(owner)
+    assert game.laser_hazards.band_at("y", game.SCREEN_HEIGHT - 10, 1) is None
+
+
+def test_band_edges_belong_to_the_band(game):
+    owner = Owner()
+    game.laser_hazards.open(owner, "x", [2], 0, "boss laser")
+    game.laser_hazards.activate(owner, 0)
+    start = 2 * game.LANE_WIDTH
+    assert game.laser_hazards.band_at("x", start, 1) is not None
+    assert game.laser_hazards.band_at("x", start + game.LANE_WIDTH, 1) is not None
+    assert game.laser_hazards.band_at("x", start - 1, 1) is None
+    # Lethal only from the step after it fired
+    assert game.laser_hazards.band_at("x", start + 5, 0) is None
+    game.laser_hazards.clear()
@@ -0,0 +1,68 @@
+import math
+
+import numpy as np
+import pytest
+
+
+def directions(emitter):
+    return emitter.vel / emitter.speed
+
+
+def test_ring_spreads_evenly_from_its_angle(sd):
+    ring = sd.Emitter({"ring": 4, "angle": math.pi / 2, "speed": 3})
+    assert np.allclose(directions(ring), [(0, 1), (-1, 0), (0, -1), (1, 0)])
+    assert np.allclose(np.hypot(*ring.vel.T), 3)
+
+
+def test_arc_fans_downward(sd):
+    arc = sd.Emitter({"arc": 3, "width": 1.0})
+    r = 1 / math.sqrt(2)
+    assert np.allclose(directions(arc), [(-r, r), (0, 1), (r, r)])
+    assert np.allclose(directions(sd.Emitter({"arc": 1})), [(0, 1)])
+
+
+def test_aimed_fan_is_centered_on_angle_zero(sd):
+    aimed = sd.Emitter({"aimed": 3, "spread": 0.5})
+    angles = np.arctan2(aimed.vel[:, 1], aimed.vel[:, 0])
+    assert np.allclose(angles, [-0.5, 0, 0.5])
+
+
+def test_line_offsets_fire_straight_down(sd):
+    line = sd.Emitter({"line": [-20, 0, 20]})
+    assert line.vel is None
+    assert np.allclose(line.offsets, [(-20, 0), (0, 0), (20, 0)])
+
+
+@pytest.fixture
+def fired(game, monkeypatch):
+    shots = []
+    monkeypatch.setattr(game, "fire_enemy_bullets", lambda pos, vel, *args, **kwargs: shots.append((pos, vel)))
+    return shots
+
+
+def test_fire_turns_the_table_by_spin_and_repeat(game, fired):
+    ring = game.Emitter({"ring": 4, "spin": 0.001, "rotate": 0.25})
+    ring.fire(100, 50, now=500, turn=2)  # 0.001 * 500 + 0.25 * 2 = 1 radian
+    pos, vel = fired[0]
+    assert np.allclose(pos, [(100, 50)] * 4)
+    angles = np.arctan2(vel[:, 1], vel[:, 0])
+    expected = (1 + np.arange(4) * math.pi / 2 + math.pi) % (2 * math.pi) - math.pi
+    assert np.allclose(angles, expected)
+
+
+def test_aimed_fire_points_at_the_player(game, fired):
+    game.player.rect.center = (400, 500)
+    game.Emitter({"aimed": 1}).fire(100, 200, now=0)
+    _, vel = fired[0]
+    assert np.allclose(vel[0] / np.hypot(*vel[0]), (1 / math.sqrt(2), 1 / math.sqrt(2)))
+
+
+@pytest.mark.parametrize("pattern, message", [
+    ({"ring": 0}, "ring"),
+    ({"arc": 3, "bullet": "laser"}, "unknown bullet"),
+    ({"ring": 8, "from": "top"}, "from"),
+    ({"ring": 8, "speed": "NO_SUCH_SETTING"}, "speed"),
+])
+def test_bad_patterns_are_rejected(sd, pattern, message):
+    with pytest.raises(ValueError, match=message):
+        sd.check_patterns([[pattern]])
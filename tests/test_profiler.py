@@ -0,0 +1,17 @@
+def test_capacity_is_read_at_construction(game):
+    game.apply_setting("PROFILE_FRAMES", 4)
+    profiler = game.FrameProfiler()
+    assert profiler.capacity == 4 and profiler.times.shape[0] == 4
+
+
+def test_ring_keeps_the_last_frames_oldest_first(game):
+    profiler = game.FrameProfiler(capacity=3)
+    profiler.enable()
+    for steps in range(1, 6):
+        profiler.begin_frame()
+        profiler.mark("update")
+        profiler.end_frame(steps)
+    assert profiler.frames == 5
+    assert list(profiler.steps[profiler.recorded()]) == [3, 4, 5]
+    names, ms = profiler.frame_times()
+    assert names == ["update", "busy"] and ms.shape == (3, 2)
@@ -0,0 +1,57 @@
+import subprocess
+import sys
+
+import pytest
+
+from conftest import GAME_DIR
+
+
+def record(sd, path, steps):
+    recorder = sd.InputRecorder(str(path), 11, 3, True)
+    for state, paused in steps:
+        recorder.record(state, paused)
+    recorder.finish()
+
+
+def test_runs_round_trip(sd, tmp_path):
+    # Run lengths of 1, 127 / 128 (one and two LEB128 bytes) and 20000 (three)
+    inputs = [((True, False, False, False), False)] + [((False, True, True, False), False)] * 127
+    inputs += [((False, False, False, True), True)] * 128 + [((False, False, False, False), False)] * 20000
+    path = tmp_path / "run.rep"
+    record(sd, path, inputs)
+    replay = sd.ReplayInput(str(path))
+    assert (replay.seed, replay.start_wave, replay.numpy_bullets, replay.steps) == (11, 3, True, len(inputs))
+    assert len(replay.changes) == 4
+    for frame, (state, paused) in enumerate(inputs):
+        replay.step(frame)
+        assert replay.read() == state and replay.paused == paused
+
+
+@pytest.mark.parametrize("damage, message", [
+    (lambda data: data[:10], "not a replay file"),
+    (lambda data: data[:-1], "truncated replay file"),
+    (lambda data: data[:-2], "truncated replay file"),
+    (lambda data: data + b"\x40\x01", "bad input byte 0x40"),
+])
+def test_damaged_files_name_the_file(sd, tmp_path, damage, message):
+    path = tmp_path / "run.rep"
+    record(sd, path, [((True, False, False, False), False)] * 200 + [((False, True, False, False), False)] * 3)
+    path.write_bytes(damage(path.read_bytes()))
+    with pytest.raises(ValueError, match=message) as error:
+        sd.ReplayInput(str(path))
+    assert str(path) in str(error.value)
+
+
+def run(*args):
+    result = subprocess.run([sys.executable, "spacedefender.py", *args], cwd=GAME_DIR,
+                            capture_output=True, text=True, check=True)
+    return result.stdout.splitlines()
+
+
+@pytest.mark.parametrize("engine, frames", [([], 4027), (["--numpy-bullets"], 3046)])
+def test_replay_reaches_the_recorded_end_state(tmp_path, engine, frames):
+    path = str(tmp_path / "bot.rep")
+    recorded = run("--headless", "--seed", "11", "--bot", "--record", path, *engine)
+    replayed = run("--replay", path)
+    assert recorded[-1] == replayed[-1] == "Wave 6, lives 0, game over"
+    assert f"Simulated {frames} frames" in recorded[0] and f"Simulated {frames} frames" in replayed[0]
@@ -0,0 +1,41 @@
+import pytest
+
+
+@pytest.mark.parametrize("name, value, message", [
+    ("NO_SUCH_SETTING", "1", "unknown setting"),
+    ("screen_width", "1", "unknown setting"),
+    ("game_state", "{}", "unknown setting"),
+    ("TANK_HEALTH", "ten", "bad value for TANK_HEALTH"),
+    ("TANK_HEALTH", "1.5", "TANK_HEALTH takes int values"),
+    ("HOMING_SIZE", "[6, 12]", "HOMING_SIZE takes tuple values"),
+    ("FPS", "30", "SIM_STEP_MS is computed from it"),
+    ("SCREEN_WIDTH", "1024", "SHIP_PRESETS bounds"),
+])
+def test_rejects_bad_names_and_values(game, name, value, message):
+    with pytest.raises(ValueError, match=message):
+        game.apply_setting(name, value)
+
+
+def test_parses_literals_and_restores_defaults(game):
+    game.apply_setting("HOMING_STRENGTH", 1)  # an int stands in for a float
+    game.apply_setting("TANK_HEALTH", "20")
+    game.apply_setting("TANK_HEALTH", 25)
+    assert game.HOMING_STRENGTH == 1.0 and type(game.HOMING_STRENGTH) is float
+    assert game.TANK_HEALTH == 25
+    game.restore_settings()
+    assert game.TANK_HEALTH == 15 and game.HOMING_STRENGTH == 0.05
+
+
+def test_settings_are_read_where_they_are_used(game):
+    game.apply_setting("COLOR_FAST_SHOOTER", (1, 2, 3))
+    game.apply_setting("HOMING_SIZE", (20, 40))
+    assert game.FastShooter(100, 100).color == (1, 2, 3)
+    homing = game.HomingSystem()
+    bullet = game.HomingBullet(100, 100)
+    homing.add(bullet)
+    bullet.add(game.enemy_bullets)
+    # Centered 15 px above the screen: inside the 40 px tall bullet, so it is kept
+    homing.pos[0] = (100, -15)
+    homing.vel[0] = (0, 0)
+    homing.update(False, (100, 300))
+    assert bullet.alive()
@@ -0,0 +1,27 @@
+def test_bouncing_ships_stay_in_their_bounds(game):
+    ships = [cls(x, 150) for cls in (game.FastShooter, game.SlowShooter, game.HeavyEnemy)
+             for x in (60, 400, 740)]
+    for step in range(600):
+        for ship in ships:
+            ship.update(step * 16, False)
+            left, top, right, bottom = ship.bounds
+            assert left <= ship.rect.left and ship.rect.right <= right
+            assert top <= ship.rect.top and ship.rect.bottom <= bottom
+
+
+def test_presets_read_settings_at_spawn(game):
+    game.apply_setting("TANK_HEALTH", 20)
+    sniper = game.Sniper(400, 100, None)
+    tank = game.Tank(400, 150, sniper)
+    sniper.tank_ref = tank
+    assert tank.health == tank.max_health == 20
+    assert sniper.protected
+    tank.health = 0
+    assert not sniper.protected
+
+
+def test_patrol_keeps_tanks_inside_their_range(game):
+    tank = game.Tank(60, 150, None)
+    for step in range(400):
+        tank.update(100 + step * 200, False)  # always the "move left" half of the patrol
+        assert tank.rect.left >= 50
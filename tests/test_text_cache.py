@@ -0,0 +1,16 @@
+def test_size_is_read_from_the_setting(game):
+    game.apply_setting("TEXT_CACHE_SIZE", 2)
+    cache = game.TextCache()
+    for text in ("a", "b", "c"):
+        cache.render(game.font_hud, text, (255, 255, 255))
+    assert cache.stats() == {"size": 2, "hits": 0, "misses": 3}
+
+
+def test_hit_returns_the_same_surface_and_refreshes_it(game):
+    cache = game.TextCache(max_size=2)
+    first = cache.render(game.font_hud, "a", (255, 255, 255))
+    cache.render(game.font_hud, "b", (255, 255, 255))
+    assert cache.render(game.font_hud, "a", [255, 255, 255]) is first
+    cache.render(game.font_hud, "c", (255, 255, 255))  # evicts "b", the least recently used
+    assert cache.render(game.font_hud, "a", (255, 255, 255)) is first
+    assert cache.stats() == {"size": 2, "hits": 2, "misses": 3}
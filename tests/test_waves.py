@@ -0,0 +1,52 @@
+TWO_WAVES = [
+    {"spawn": [["FastShooter", 2]], "clear": ["enemies"]},
+    {"spawn": [["Kamikaze", 1], ["SlowShooter", 1]], "clear": ["kamikazes"], "delay": 3000},
+]
+
+
+def wait(game, ms):
+    """Step the game clock ms forward and return the new time."""
+    end = game.clock.get_ticks() + ms
+    while game.clock.get_ticks() < end:
+        game.clock.step()
+    return game.clock.get_ticks()
+
+
+def test_waves_start_after_their_delay_once_cleared(game):
+    game.apply_setting("WAVES", TWO_WAVES)
+    game.reset_game()
+    manager, state = game.wave_manager, game.game_state
+    assert state["wave"] == 0
+
+    # The lull before wave 1 lasts WAVE_DELAY
+    manager.update(game.clock.get_ticks())
+    assert state["wave"] == 0
+    manager.update(wait(game, game.WAVE_DELAY + 1))
+    assert state["wave"] == 1 and len(game.enemy_sprites) == 2 and manager.remaining == 2
+
+    # Wave 2 waits for wave 1's clear groups, then for wave 1's delay
+    manager.update(wait(game, game.WAVE_DELAY + 1))
+    assert state["wave"] == 1
+    for enemy in game.enemy_sprites.sprites():
+        enemy.kill()
+    assert manager.remaining == 0
+    manager.update(game.clock.get_ticks())
+    assert state["wave"] == 2
+    assert len(game.kamikaze_sprites) == 1 and len(game.enemy_sprites) == 1
+
+    # Only the kamikaze counts towards clearing the last wave
+    assert manager.remaining == 1 and not manager.finished()
+    game.kamikaze_sprites.sprites()[0].kill()
+    assert manager.finished()
+    manager.update(wait(game, 5000))
+    assert state["wave"] == 2
+
+
+def test_laser_ships_follow_the_wave_table(game):
+    game.apply_setting("WAVES", [{"spawn": [], "clear": [], "laser_ships": False}, {"spawn": [], "clear": []}])
+    game.reset_game()
+    assert not game.wave_manager.laser_ships()  # the lull before wave 1
+    game.game_state["wave"] = 1
+    assert not game.wave_manager.laser_ships()
+    game.game_state["wave"] = 2
+    assert game.wave_manager.laser_ships()
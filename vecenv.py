@@ -0,0 +1,173 @@
+"""
+Vectorized environment for Alien Invasion Defender.
+
+VecEnv runs N independent headless games, one per worker process. Each
+worker is `spacedefender.py --env-worker`, so every game keeps its own
+module globals. All games are stepped in lockstep. Actions,
+observations, rewards and done flags live in one shared-memory block,
+so a step only sends one command byte and one ack byte through each
+worker's pipes. Nothing is pickled.
+
+Actions are bitmasks of ACTION_LEFT / ACTION_RIGHT / ACTION_UP /
+ACTION_DOWN (0 = stand still). Rewards come back as one row per env,
+with columns REWARD_FIELDS: lives lost, enemies killed and waves
+advanced during the step. A finished episode is reset automatically.
+The observation returned with done=1 is the first one of the next
+episode.
+
+    with VecEnv(8, seed=0) as env:
+        obs = env.reset()
+        obs, rewards, dones = env.step(actions)
+
+Run this file directly to measure steps/s for a few env counts.
+"""
+import argparse
+import os
+import struct
+import subprocess
+import sys
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+GAME_DIR = os.path.dirname(os.path.abspath(__file__))
+GAME_SCRIPT = os.path.join(GAME_DIR, "spacedefender.py")
+
+ACTION_LEFT = 1
+ACTION_RIGHT = 2
+ACTION_UP = 4
+ACTION_DOWN = 8
+NUM_ACTIONS = 16
+
+REWARD_FIELDS = ("lives_lost", "enemies_killed", "waves_advanced")
+
+HANDSHAKE = struct.Struct("<I")  # observation size, sent by each worker on startup
+
+
+def buffer_layout(num_envs, obs_size):
+    # (name, dtype, shape) in the order they sit in the shared block
+    return (("obs", np.float32, (num_envs, obs_size)),
+            ("rewards", np.float32, (num_envs, len(REWARD_FIELDS))),
+            ("actions", np.uint8, (num_envs,)),
+            ("dones", np.uint8, (num_envs,)))
+
+
+def buffer_size(num_envs, obs_size):
+    return sum(int(np.prod(shape)) * np.dtype(dtype).itemsize
+               for _, dtype, shape in buffer_layout(num_envs, obs_size))
+
+
+def carve(buf, num_envs, obs_size):
+    """Return the named array views into a shared block laid out by buffer_layout."""
+    views = {}
+    offset = 0
+    for name, dtype, shape in buffer_layout(num_envs, obs_size):
+        views[name] = np.ndarray(shape, dtype=dtype, buffer=buf, offset=offset)
+        offset += int(np.prod(shape)) * np.dtype(dtype).itemsize
+    return views
+
+
+class VecEnv:
+    def __init__(self, num_envs, seed=0, wave=1, frame_skip=1, max_episode_steps=None, numpy_bullets=False):
+        self.num_envs = num_envs
+        self.closed = False
+        env = dict(os.environ, PYGAME_HIDE_SUPPORT_PROMPT="1")
+
+        self.procs = []
+        for i in range(num_envs):
+            cmd = [sys.executable, GAME_SCRIPT, "--env-worker",
+                   "--seed", str(seed + i), "--wave", str(wave), "--frame-skip", str(frame_skip)]
+            if max_episode_steps is not None:
+                cmd += ["--max-episode-steps", str(max_episode_steps)]
+            if numpy_bullets:
+                cmd.append("--numpy-bullets")
+            self.procs.append(subprocess.Popen(cmd, cwd=GAME_DIR, env=env, bufsize=0,
+                                               stdin=subprocess.PIPE, stdout=subprocess.PIPE))
+
+        sizes = set()
+        for p in self.procs:
+            data = p.stdout.read(HANDSHAKE.size)
+            if len(data) != HANDSHAKE.size:
+                self.close()
+                raise RuntimeError("env worker exited during startup")
+            sizes.add(HANDSHAKE.unpack(data)[0])
+        if len(sizes) != 1:
+            self.close()
+            raise RuntimeError(f"env workers disagree on observation size: {sorted(sizes)}")
+        self.obs_size = sizes.pop()
+
+        self.shm = shared_memory.SharedMemory(create=True, size=buffer_size(num_envs, self.obs_size))
+        views = carve(self.shm.buf, num_envs, self.obs_size)
+        self.obs, self.rewards = views["obs"], views["rewards"]
+        self.actions, self.dones = views["actions"], views["dones"]
+        for i, p in enumerate(self.procs):
+            p.stdin.write(f"{self.shm.name} {i} {num_envs}\n".encode())
+
+    def _command(self, cmd):
+        # Send to every worker first so they all run at once, then wait for every ack
+        for p in self.procs:
+            p.stdin.write(cmd)
+        for p in self.procs:
+            if p.stdout.read(1) != b"k":
+                raise RuntimeError("env worker died")
+
+    def reset(self):
+        self._command(b"r")
+        return self.obs.copy()
+
+    def step(self, actions):
+        """
+        actions: one action bitmask per env. Returns (obs, rewards, dones) as
+        arrays of shape (num_envs, obs_size), (num_envs, 3) and (num_envs,).
+        """
+        self.actions[:] = actions
+        self._command(b"s")
+        return self.obs.copy(), self.rewards.copy(), self.dones.astype(bool)
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        for p in self.procs:
+            try:
+                p.stdin.write(b"q")
+                p.stdin.close()
+            except OSError:
+                pass
+        for p in self.procs:
+            p.wait()
+        if hasattr(self, "shm"):
+            self.obs = self.rewards = self.actions = self.dones = None
+            self.shm.close()
+            self.shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure VecEnv throughput with random actions")
+    parser.add_argument("--envs", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--steps", type=int, default=2000)
+    parser.add_argument("--frame-skip", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    base = None
+    for n in args.envs:
+        with VecEnv(n, frame_skip=args.frame_skip, max_episode_steps=3600) as env:
+            env.reset()
+            start = time.perf_counter()
+            for _ in range(args.steps):
+                env.step(rng.integers(0, NUM_ACTIONS, size=n, dtype=np.uint8))
+            rate = n * args.steps / (time.perf_counter() - start)
+        base = base or rate
+        print(f"{n:3d} envs: {rate:9.0f} env steps/s ({rate / base:.2f}x one env)")
+
+
+if __name__ == "__main__":
+    main()